@@ -1,19 +1,84 @@
 import streamlit as st
-from streamlit_chat import message
 import os
-from config import USER_UPLOADS_PATH
+import shutil
+from config import (
+    USER_UPLOADS_PATH, DB_CACHE_TTL, USER_VS_CACHE_ENTRIES, LLM_CACHE_TTL, LLM_CACHE_ENTRIES
+)
 from database import DatabaseManager
 from vectorstore import VectorStoreManager
 from llm import LLMManager
 
+
+@st.cache_resource
+def get_db():
+    """Returns a DatabaseManager shared across reruns and sessions."""
+    return DatabaseManager()
+
+
+@st.cache_resource
+def get_vsm():
+    """Returns a VectorStoreManager so the embedding model is loaded only once."""
+    return VectorStoreManager()
+
+
+@st.cache_resource
+def get_llm():
+    """Returns an LLMManager so the Groq client is created only once."""
+    return LLMManager()
+
+
+@st.cache_data(ttl=DB_CACHE_TTL)
+def _get_user_chats(user_id):
+    """Cached chat list for a user; cleared whenever chats are created or deleted."""
+    return get_db().get_user_chats(user_id)
+
+
+@st.cache_data(ttl=DB_CACHE_TTL)
+def _get_chat_history(chat_id):
+    """Cached message history for a chat; cleared whenever messages change."""
+    return get_db().get_chat_history(chat_id)
+
+
+@st.cache_data(ttl=DB_CACHE_TTL)
+def _get_uploads_for_chat(chat_id):
+    """Cached upload paths for a chat; cleared whenever uploads change."""
+    return get_db().get_uploads_for_chat(chat_id)
+
+
+@st.cache_resource(max_entries=USER_VS_CACHE_ENTRIES)
+def _build_user_vectorstore(chat_id, chunking_strategy, files_key):
+    """Builds a chat's user vector store once per (strategy, file set) combination."""
+    return get_vsm().create_user_vectorstore([path for path, _ in files_key], chunking_strategy)
+
+
+def _load_user_vectorstore(chat_id, file_paths, chunking_strategy):
+    """Loads the cached user vector store into session state, rebuilding only when files change."""
+    # Modification times make the key change whenever a file is overwritten
+    files_key = tuple(
+        (path, os.path.getmtime(path)) for path in sorted(file_paths) if os.path.exists(path)
+    )
+    st.session_state.user_vs_key = (chat_id, chunking_strategy, files_key)
+    st.session_state.user_vector_store = _build_user_vectorstore(chat_id, chunking_strategy, files_key)
+
+
+@st.cache_data(ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_ENTRIES, show_spinner=False)
+def _generate_cached_response(_llm, _rag_chain, rag_key, history, user_query, _session_id):
+    """Answers a query, reusing earlier answers for the same retriever, history and question.
+
+    Parameters prefixed with an underscore are excluded from the cache key.
+    """
+    chat_history = [{"type": role, "content": content} for role, content in history]
+    return _llm.generate_response(_rag_chain, chat_history, user_query, session_id=_session_id)
+
+
 class CampusChatbotApp:
     """The main application class for the Streamlit chatbot."""
 
     def __init__(self):
         st.set_page_config(page_title="Campus Chatbot", layout="wide")
-        self.db = DatabaseManager()
-        self.vsm = VectorStoreManager()
-        self.llm = LLMManager()
+        self.db = get_db()
+        self.vsm = get_vsm()
+        self.llm = get_llm()
 
     def _initialize_session_state(self):
         """Initializes session state variables."""
@@ -29,6 +94,10 @@ class CampusChatbotApp:
             st.session_state.user_vector_store = None
         if "rag_chain" not in st.session_state:
             st.session_state.rag_chain = None
+        if "user_vs_key" not in st.session_state:
+            st.session_state.user_vs_key = None
+        if "rag_key" not in st.session_state:
+            st.session_state.rag_key = None
 
     def _show_login_page(self):
         """Displays the login and signup forms."""
@@ -76,33 +145,42 @@ class CampusChatbotApp:
                 user_chat_uploads_dir = os.path.join(USER_UPLOADS_PATH, str(st.session_state.current_chat_id))
                 os.makedirs(user_chat_uploads_dir, exist_ok=True)
                 
+                # Fetch recorded uploads once so duplicates are filtered in Python
+                existing_uploads = set(_get_uploads_for_chat(st.session_state.current_chat_id))
                 saved_file_paths = []
+                new_uploads = []
                 for file in uploaded_files:
                     try:
                         file_path = os.path.join(user_chat_uploads_dir, file.name)
-                        with open(file_path, "wb") as f:
-                            f.write(file.getbuffer())
-                        # Check if this file is already recorded to avoid duplicates
-                        if file_path not in self.db.get_uploads_for_chat(st.session_state.current_chat_id):
-                            self.db.add_upload(st.session_state.current_chat_id, file_path)
+                        # Skip rewriting files already saved on an earlier rerun
+                        if not (os.path.exists(file_path) and os.path.getsize(file_path) == file.size):
+                            file.seek(0)
+                            with open(file_path, "wb") as f:
+                                shutil.copyfileobj(file, f, 1024 * 1024)
+                        if file_path not in existing_uploads:
+                            new_uploads.append((st.session_state.current_chat_id, file_path))
+                            existing_uploads.add(file_path)
                         saved_file_paths.append(file_path)
                     except Exception as e:
                         st.error(f"Error uploading {file.name}: {e}")
+                if new_uploads:
+                    self.db.add_uploads_many(new_uploads)
+                    _get_uploads_for_chat.clear()
             
             # Recreate vector store with all files for this chat
-            all_chat_files = self.db.get_uploads_for_chat(st.session_state.current_chat_id)
+            all_chat_files = _get_uploads_for_chat(st.session_state.current_chat_id)
             if all_chat_files:
-                st.session_state.user_vector_store = self.vsm.create_user_vectorstore(
-                    all_chat_files, chunking_strategy
+                _load_user_vectorstore(
+                    st.session_state.current_chat_id, all_chat_files, chunking_strategy
                 )
                 st.success(f"{len(uploaded_files)} file(s) processed successfully!")
         
         # Ensure user_vector_store is loaded for existing files on rerun
         elif st.session_state.user_vector_store is None:
-             all_chat_files = self.db.get_uploads_for_chat(st.session_state.current_chat_id)
+             all_chat_files = _get_uploads_for_chat(st.session_state.current_chat_id)
              if all_chat_files:
-                 st.session_state.user_vector_store = self.vsm.create_user_vectorstore(
-                    all_chat_files, chunking_strategy
+                 _load_user_vectorstore(
+                    st.session_state.current_chat_id, all_chat_files, chunking_strategy
                 )
 
 
@@ -116,26 +194,39 @@ class CampusChatbotApp:
                 st.session_state.current_chat_id = None
                 st.session_state.chat_history = []
                 st.session_state.user_vector_store = None
+                st.session_state.user_vs_key = None
                 st.session_state.rag_chain = None
 
             st.subheader("Your Chats")
-            user_chats = self.db.get_user_chats(st.session_state.user_id)
-            for chat_id, chat_name in user_chats:
-                col1, col2 = st.columns([0.8, 0.2])
-                with col1:
-                    if st.button(f"{chat_name} (ID: {chat_id})", key=f"chat_{chat_id}", use_container_width=True):
-                        st.session_state.current_chat_id = chat_id
-                        st.session_state.chat_history = self.db.get_chat_history(chat_id)
-                        st.session_state.user_vector_store = None # Will be lazy-loaded
-                        st.session_state.rag_chain = None
-
-                with col2:
-                    if st.button("🗑️", key=f"del_{chat_id}"):
-                        self.db.delete_chat(chat_id)
-                        if st.session_state.current_chat_id == chat_id:
-                            st.session_state.current_chat_id = None
-                            st.session_state.chat_history = []
-                        st.rerun()
+            user_chats = _get_user_chats(st.session_state.user_id)
+            if user_chats:
+                # A single radio + delete button keeps the widget count constant
+                chat_names = dict(user_chats)
+                chat_ids = list(chat_names)
+                current_chat_id = st.session_state.current_chat_id
+                selected_chat_id = st.radio(
+                    "Your Chats",
+                    options=chat_ids,
+                    index=chat_ids.index(current_chat_id) if current_chat_id in chat_names else None,
+                    format_func=lambda chat_id: f"{chat_names[chat_id]} (ID: {chat_id})",
+                    label_visibility="collapsed",
+                )
+                if selected_chat_id is not None and selected_chat_id != current_chat_id:
+                    st.session_state.current_chat_id = selected_chat_id
+                    st.session_state.chat_history = _get_chat_history(selected_chat_id)
+                    st.session_state.user_vector_store = None # Will be lazy-loaded
+                    st.session_state.user_vs_key = None
+                    st.session_state.rag_chain = None
+
+                if st.button("🗑️ Delete selected chat", disabled=selected_chat_id is None):
+                    self.db.delete_chat(selected_chat_id)
+                    _get_user_chats.clear()
+                    _get_chat_history.clear()
+                    _get_uploads_for_chat.clear()
+                    if st.session_state.current_chat_id == selected_chat_id:
+                        st.session_state.current_chat_id = None
+                        st.session_state.chat_history = []
+                    st.rerun()
 
             st.subheader("Settings")
             chunking_strategy = st.selectbox("Chunking Strategy", ["recursive", "fixed_size", "semantic"])
@@ -152,34 +243,56 @@ class CampusChatbotApp:
             st.info("Start a new chat or select an existing one from the sidebar.")
             return
 
-        # Handle file uploads and update retriever
+        self._render_uploads(chunking_strategy)
+        self._render_chat(search_strategy)
+
+    @st.fragment
+    def _render_uploads(self, chunking_strategy):
+        """Displays the file uploader; dropping files reruns only this block."""
         self._handle_file_uploads(chunking_strategy)
-        retriever = self.vsm.get_retriever(st.session_state.user_vector_store, search_strategy)
-        st.session_state.rag_chain = self.llm.get_rag_chain(retriever)
 
-        # Display chat history
-        # ---- THIS IS THE CORRECTED PART ----
-        for i, msg in enumerate(st.session_state.chat_history):
+    @st.fragment
+    def _render_chat(self, search_strategy):
+        """Displays the chat transcript and input; reruns without the rest of the page."""
+        # Only rebuild the RAG chain when the search strategy or user store changes.
+        # Checked here so uploads handled in their own fragment are picked up.
+        rag_key = (search_strategy, st.session_state.user_vs_key)
+        if st.session_state.rag_chain is None or st.session_state.rag_key != rag_key:
+            retriever = self.vsm.get_retriever(st.session_state.user_vector_store, search_strategy)
+            st.session_state.rag_chain = self.llm.get_rag_chain(retriever)
+            st.session_state.rag_key = rag_key
+
+        for msg in st.session_state.chat_history:
             role = "user" if msg["type"] == "human" else "assistant"
-            # Use the index 'i' to create a unique key for each message
-            message(msg["content"], is_user=(role == "user"), key=f"msg_{st.session_state.current_chat_id}_{i}")
+            with st.chat_message(role):
+                st.markdown(msg["content"])
 
         # Chat input
         user_query = st.chat_input("Ask a question about campus policies or documents...")
         if user_query:
+            with st.chat_message("user"):
+                st.markdown(user_query)
             self.db.add_message(st.session_state.current_chat_id, "human", user_query)
             
-            with st.spinner("Thinking..."):
-                response = self.llm.generate_response(
-                    st.session_state.rag_chain,
-                    st.session_state.chat_history,
-                    user_query,
-                    session_id=str(st.session_state.current_chat_id)
-                )
+            with st.chat_message("assistant"):
+                with st.spinner("Thinking..."):
+                    response = _generate_cached_response(
+                        self.llm,
+                        st.session_state.rag_chain,
+                        st.session_state.rag_key,
+                        tuple((msg["type"], msg["content"]) for msg in st.session_state.chat_history),
+                        user_query,
+                        str(st.session_state.current_chat_id)
+                    )
+                st.markdown(response["answer"])
             
             self.db.add_message(st.session_state.current_chat_id, "ai", response["answer"])
-            st.session_state.chat_history = self.db.get_chat_history(st.session_state.current_chat_id)
-            st.rerun()
+            _get_chat_history.clear()
+            # Append locally instead of re-reading what was just written
+            st.session_state.chat_history.extend([
+                {"type": "human", "content": user_query},
+                {"type": "ai", "content": response["answer"]},
+            ])
 
     def run(self):
         """The main execution method of the app."""
@@ -190,6 +303,7 @@ class CampusChatbotApp:
             # Create a new chat if one isn't selected
             if st.session_state.current_chat_id is None:
                 st.session_state.current_chat_id = self.db.create_chat(st.session_state.user_id)
+                _get_user_chats.clear()
                 st.session_state.chat_history = []
             self._show_main_app()
 
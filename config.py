@@ -1,49 +1,145 @@
 import os
+from dataclasses import dataclass, field
 
-# --- PATHS ---
-# Base directory of the project
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# Path to the folder containing admin-provided documents
-ADMIN_DOCS_PATH = os.path.join(BASE_DIR, "admin_docs")
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Application settings, exposed as the CONFIG singleton.
 
-# Path to the folder where user-uploaded files will be stored
-USER_UPLOADS_PATH = os.path.join(BASE_DIR, "user_uploads")
+    Instances hash by identity so CONFIG can be used as a key for cached factories.
+    """
 
-# Path to the folder where the persistent FAISS vector store will be saved
-VECTOR_STORE_PATH = os.path.join(BASE_DIR, "vector_store")
+    # --- PATHS ---
+    # Base directory of the project
+    base_dir: str = os.path.dirname(os.path.abspath(__file__))
 
-# Path to the SQLite database file
-DATABASE_PATH = os.path.join(BASE_DIR, "chatbot.db")
+    # Path to the folder containing admin-provided documents
+    admin_docs_path: str = field(init=False)
 
+    # Path to the folder where user-uploaded files will be stored
+    user_uploads_path: str = field(init=False)
 
-# --- MODELS ---
-# Name of the sentence-transformer model for embeddings
-EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+    # Path to the folder where the persistent FAISS vector store will be saved
+    vector_store_path: str = field(init=False)
 
-# Name of the Groq model for language generation
-LLM_MODEL_NAME = "openai/gpt-oss-120b"
+    # Path to the SQLite database file
+    database_path: str = field(init=False)
 
 
-# --- RETRIEVER SETTINGS ---
-# Default number of documents to retrieve
-K_RETRIEVER = 5
+    # --- MODELS ---
+    # Name of the sentence-transformer model for embeddings
+    embedding_model_name: str = "all-MiniLM-L6-v2"
 
-# Default search strategy ('similarity', 'mmr', 'hybrid')
-DEFAULT_SEARCH_STRATEGY = "hybrid"
+    # Name of the Groq model for language generation
+    llm_model_name: str = "openai/gpt-oss-120b"
 
-# Default chunking strategy ('recursive', 'fixed_size', 'semantic')
-DEFAULT_CHUNKING_STRATEGY = "recursive"
+    # Number of texts encoded per forward pass of the embedding model
+    embed_batch_size: int = 128
 
+    # Inference backend for the embedding model ('torch', 'onnx', 'openvino').
+    # 'onnx' needs `pip install optimum[onnxruntime]`, 'openvino' needs `optimum[openvino]`.
+    embedding_backend: str = "torch"
 
-# --- CHUNKING PARAMETERS ---
-# For RecursiveCharacterTextSplitter
-RECURSIVE_CHUNK_SIZE = 1000
-RECURSIVE_CHUNK_OVERLAP = 150
+    # Run the torch embedding model in half precision when a CUDA GPU is used
+    embedding_fp16_on_gpu: bool = True
 
-# For CharacterTextSplitter (fixed_size)
-FIXED_CHUNK_SIZE = 800
-FIXED_CHUNK_OVERLAP = 100
 
-# For semantic chunking (number of clusters)
-SEMANTIC_N_CLUSTERS = 10
\ No newline at end of file
+    # --- CACHING ---
+    # Seconds that cached chat/upload lookups stay valid in the Streamlit app
+    db_cache_ttl: int = 300
+
+    # Maximum number of user vector stores kept in memory across sessions
+    user_vs_cache_entries: int = 32
+
+    # Maximum number of retrievers memoized by VectorStoreManager.get_retriever
+    retriever_cache_entries: int = 32
+
+    # Seconds and maximum entries for cached LLM answers to repeated questions
+    llm_cache_ttl: int = 600
+    llm_cache_entries: int = 512
+
+
+    # --- RETRIEVER SETTINGS ---
+    # Default number of documents to retrieve
+    k_retriever: int = 5
+
+    # Default search strategy ('similarity', 'mmr', 'hybrid')
+    default_search_strategy: str = "hybrid"
+
+    # Default chunking strategy ('recursive', 'fixed_size', 'semantic')
+    default_chunking_strategy: str = "recursive"
+
+
+    # --- CHUNKING PARAMETERS ---
+    # For RecursiveCharacterTextSplitter
+    recursive_chunk_size: int = 1000
+    recursive_chunk_overlap: int = 150
+
+    # For CharacterTextSplitter (fixed_size)
+    fixed_chunk_size: int = 800
+    fixed_chunk_overlap: int = 100
+
+    # For semantic chunking (number of clusters)
+    semantic_n_clusters: int = 10
+
+
+    # --- INDEXING ---
+    # Minimum number of vectors before a store is kept as int8 (scalar quantized)
+    quantize_min_vectors: int = 256
+
+    # Minimum number of vectors before a store switches to an IVF-PQ index
+    ivf_min_vectors: int = 10000
+
+    # Number of IVF lists, lists probed per query, and PQ sub-quantizers (bytes per vector)
+    ivf_nlist: int = 256
+    ivf_nprobe: int = 16
+    pq_m: int = 32
+
+    def __post_init__(self):
+        # Derived paths; object.__setattr__ is required on a frozen dataclass
+        object.__setattr__(self, "admin_docs_path", os.path.join(self.base_dir, "admin_docs"))
+        object.__setattr__(self, "user_uploads_path", os.path.join(self.base_dir, "user_uploads"))
+        object.__setattr__(self, "vector_store_path", os.path.join(self.base_dir, "vector_store"))
+        object.__setattr__(self, "database_path", os.path.join(self.base_dir, "chatbot.db"))
+
+    def __hash__(self):
+        return id(self)
+
+
+CONFIG = Config()
+
+
+# --- Module-level names kept for existing `from config import ...` users ---
+BASE_DIR = CONFIG.base_dir
+ADMIN_DOCS_PATH = CONFIG.admin_docs_path
+USER_UPLOADS_PATH = CONFIG.user_uploads_path
+VECTOR_STORE_PATH = CONFIG.vector_store_path
+DATABASE_PATH = CONFIG.database_path
+
+EMBEDDING_MODEL_NAME = CONFIG.embedding_model_name
+LLM_MODEL_NAME = CONFIG.llm_model_name
+EMBED_BATCH_SIZE = CONFIG.embed_batch_size
+EMBEDDING_BACKEND = CONFIG.embedding_backend
+EMBEDDING_FP16_ON_GPU = CONFIG.embedding_fp16_on_gpu
+
+DB_CACHE_TTL = CONFIG.db_cache_ttl
+USER_VS_CACHE_ENTRIES = CONFIG.user_vs_cache_entries
+RETRIEVER_CACHE_ENTRIES = CONFIG.retriever_cache_entries
+LLM_CACHE_TTL = CONFIG.llm_cache_ttl
+LLM_CACHE_ENTRIES = CONFIG.llm_cache_entries
+
+K_RETRIEVER = CONFIG.k_retriever
+DEFAULT_SEARCH_STRATEGY = CONFIG.default_search_strategy
+DEFAULT_CHUNKING_STRATEGY = CONFIG.default_chunking_strategy
+
+RECURSIVE_CHUNK_SIZE = CONFIG.recursive_chunk_size
+RECURSIVE_CHUNK_OVERLAP = CONFIG.recursive_chunk_overlap
+FIXED_CHUNK_SIZE = CONFIG.fixed_chunk_size
+FIXED_CHUNK_OVERLAP = CONFIG.fixed_chunk_overlap
+SEMANTIC_N_CLUSTERS = CONFIG.semantic_n_clusters
+
+QUANTIZE_MIN_VECTORS = CONFIG.quantize_min_vectors
+IVF_MIN_VECTORS = CONFIG.ivf_min_vectors
+IVF_NLIST = CONFIG.ivf_nlist
+IVF_NPROBE = CONFIG.ivf_nprobe
+PQ_M = CONFIG.pq_m
@@ -1,31 +1,65 @@
 import sqlite3
 import hashlib
+import hmac
 import json
+import os
+import threading
 from config import DATABASE_PATH
 
+# scrypt cost parameters used for password hashing
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+
+# Salt and stored-hash stand-in for the throwaway check that keeps failed logins
+# for unknown users as slow as real ones (scrypt's 64-byte key is 128 hex chars)
+DUMMY_SALT = bytes(SALT_BYTES)
+DUMMY_PASSWORD_HASH = "0" * 128
+
 class DatabaseManager:
     """Manages all database operations for the chatbot."""
 
     def __init__(self, db_path=DATABASE_PATH):
         self.db_path = db_path
+        # A single connection is reused for every operation; the lock serialises
+        # access since the manager is shared between Streamlit sessions/threads.
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.RLock()
         self._create_tables()
+        # Enabled after table creation so legacy rows can be migrated as-is
+        self.conn.execute("PRAGMA foreign_keys=ON")
 
     def _get_connection(self):
-        """Returns a database connection."""
-        return sqlite3.connect(self.db_path)
+        """Returns the shared database connection."""
+        return self.conn
+
+    def close(self):
+        """Closes the shared database connection."""
+        with self._lock:
+            self.conn.close()
 
     def _create_tables(self):
         """Creates database tables if they don't exist."""
-        with self._get_connection() as conn:
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
+            # Run the whole schema setup (and any migration) as one transaction
+            cursor.execute("BEGIN")
             # Users table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS users (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     username TEXT UNIQUE NOT NULL,
-                    password_hash TEXT NOT NULL
+                    password_hash TEXT NOT NULL,
+                    salt BLOB
                 )
             """)
+            # Databases created before salted hashing lack the salt column
+            user_columns = [row[1] for row in cursor.execute("PRAGMA table_info(users)")]
+            if "salt" not in user_columns:
+                cursor.execute("ALTER TABLE users ADD COLUMN salt BLOB")
             # Chats table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS chats (
@@ -35,6 +69,7 @@ class DatabaseManager:
                     FOREIGN KEY (user_id) REFERENCES users (id)
                 )
             """)
+            legacy_tables = self._rename_tables_without_cascade(cursor)
             # Messages table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS messages (
@@ -42,7 +77,7 @@ class DatabaseManager:
                     chat_id INTEGER NOT NULL,
                     role TEXT NOT NULL,
                     content TEXT NOT NULL,
-                    FOREIGN KEY (chat_id) REFERENCES chats (id)
+                    FOREIGN KEY (chat_id) REFERENCES chats (id) ON DELETE CASCADE
                 )
             """)
             # Uploads table to link files to chats
@@ -51,56 +86,103 @@ class DatabaseManager:
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     chat_id INTEGER NOT NULL,
                     file_path TEXT NOT NULL,
-                    FOREIGN KEY (chat_id) REFERENCES chats (id)
+                    FOREIGN KEY (chat_id) REFERENCES chats (id) ON DELETE CASCADE
                 )
             """)
-            conn.commit()
+            # Copy rows from tables created before ON DELETE CASCADE was declared
+            for table, columns in legacy_tables:
+                cursor.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {table}_legacy")
+                cursor.execute(f"DROP TABLE {table}_legacy")
+            # Indexes for the per-user / per-chat lookups and deletes
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_chats_user ON chats (user_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages (chat_id, id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_chat ON uploads (chat_id)")
 
-    def _hash_password(self, password):
-        """Hashes a password for secure storage."""
-        return hashlib.sha256(password.encode()).hexdigest()
+    def _rename_tables_without_cascade(self, cursor):
+        """Renames child tables lacking ON DELETE CASCADE so they can be rebuilt."""
+        legacy_tables = []
+        for table, columns in (("messages", "id, chat_id, role, content"), ("uploads", "id, chat_id, file_path")):
+            foreign_keys = cursor.execute(f"PRAGMA foreign_key_list({table})").fetchall()
+            # Column 6 of foreign_key_list is the ON DELETE action
+            if any(fk[6] != "CASCADE" for fk in foreign_keys):
+                cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_legacy")
+                legacy_tables.append((table, columns))
+        return legacy_tables
+
+    def _hash_password(self, password, salt):
+        """Hashes a password with scrypt and the given per-user salt."""
+        return hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P).hex()
+
+    def _verify_password(self, password, password_hash, salt):
+        """Checks a password against a stored hash in constant time."""
+        if salt is None:
+            # Account created before salted hashing: stored as unsalted SHA-256.
+            # scrypt still runs so legacy accounts take as long to check as any other.
+            self._hash_password(password, DUMMY_SALT)
+            candidate = hashlib.sha256(password.encode()).hexdigest()
+        else:
+            candidate = self._hash_password(password, salt)
+        return hmac.compare_digest(candidate, password_hash)
 
     def signup(self, username, password):
         """Signs up a new user."""
         if not username or not password:
             return False, "Username and password cannot be empty."
-        password_hash = self._hash_password(password)
-        with self._get_connection() as conn:
+        salt = os.urandom(SALT_BYTES)
+        password_hash = self._hash_password(password, salt)
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
             try:
-                cursor.execute("INSERT INTO users (username, password_hash) VALUES (?, ?)", (username, password_hash))
-                conn.commit()
+                cursor.execute(
+                    "INSERT INTO users (username, password_hash, salt) VALUES (?, ?, ?)",
+                    (username, password_hash, salt)
+                )
                 return True, "Signup successful."
             except sqlite3.IntegrityError:
                 return False, "Username already exists."
 
     def login(self, username, password):
         """Logs in a user and returns user_id if successful."""
-        password_hash = self._hash_password(password)
-        with self._get_connection() as conn:
+        if not username or not password:
+            return None
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT id FROM users WHERE username = ? AND password_hash = ?", (username, password_hash))
+            cursor.execute("SELECT id, password_hash, salt FROM users WHERE username = ?", (username,))
             user = cursor.fetchone()
-            return user[0] if user else None
+        if not user:
+            # Hash and compare anyway so response time doesn't reveal whether the username exists
+            hmac.compare_digest(self._hash_password(password, DUMMY_SALT), DUMMY_PASSWORD_HASH)
+            return None
+        user_id, password_hash, salt = user
+        if not self._verify_password(password, password_hash, salt):
+            return None
+        if salt is None:
+            # Upgrade legacy SHA-256 hashes to scrypt on successful login
+            salt = os.urandom(SALT_BYTES)
+            with self._lock, self._get_connection() as conn:
+                conn.execute(
+                    "UPDATE users SET password_hash = ?, salt = ? WHERE id = ?",
+                    (self._hash_password(password, salt), salt, user_id)
+                )
+        return user_id
 
     def create_chat(self, user_id, chat_name="New Chat"):
         """Creates a new chat session for a user."""
-        with self._get_connection() as conn:
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT INTO chats (user_id, chat_name) VALUES (?, ?)", (user_id, chat_name))
-            conn.commit()
             return cursor.lastrowid
 
     def get_user_chats(self, user_id):
         """Retrieves all chats for a given user."""
-        with self._get_connection() as conn:
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT id, chat_name FROM chats WHERE user_id = ? ORDER BY id DESC", (user_id,))
             return cursor.fetchall()
 
     def get_chat_history(self, chat_id):
         """Retrieves all messages for a given chat."""
-        with self._get_connection() as conn:
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT role, content FROM messages WHERE chat_id = ? ORDER BY id ASC", (chat_id,))
             # Convert to the format expected by LangChain's memory
@@ -108,30 +190,30 @@ class DatabaseManager:
 
     def add_message(self, chat_id, role, content):
         """Adds a message to the chat history."""
-        with self._get_connection() as conn:
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT INTO messages (chat_id, role, content) VALUES (?, ?, ?)", (chat_id, role, content))
-            conn.commit()
 
     def delete_chat(self, chat_id):
-        """Deletes a chat and all its associated messages and uploads."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM messages WHERE chat_id = ?", (chat_id,))
-            cursor.execute("DELETE FROM uploads WHERE chat_id = ?", (chat_id,))
-            cursor.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
-            conn.commit()
+        """Deletes a chat; its messages and uploads are removed via ON DELETE CASCADE."""
+        with self._lock, self._get_connection() as conn:
+            conn.execute("DELETE FROM chats WHERE id = ?", (chat_id,))
 
     def add_upload(self, chat_id, file_path):
         """Records a file upload associated with a chat."""
-        with self._get_connection() as conn:
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("INSERT INTO uploads (chat_id, file_path) VALUES (?, ?)", (chat_id, file_path))
-            conn.commit()
+    
+    def add_uploads_many(self, uploads):
+        """Records several (chat_id, file_path) uploads in a single transaction."""
+        with self._lock, self._get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.executemany("INSERT INTO uploads (chat_id, file_path) VALUES (?, ?)", uploads)
     
     def get_uploads_for_chat(self, chat_id):
         """Retrieves all file paths for a given chat."""
-        with self._get_connection() as conn:
+        with self._lock, self._get_connection() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT file_path FROM uploads WHERE chat_id = ?", (chat_id,))
             return [row[0] for row in cursor.fetchall()]
\ No newline at end of file
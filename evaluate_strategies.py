@@ -2,9 +2,19 @@
 # It requires manual setup and is not part of the main Streamlit app.
 
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from vectorstore import VectorStoreManager
 from llm import LLMManager
 
+# Groq calls are network-bound, so queries for a strategy run concurrently
+MAX_WORKERS = 8
+
+def timed_invoke(rag_chain, query):
+    """Invokes the RAG chain for a query and returns (response, latency_seconds)."""
+    start_time = time.time()
+    response = rag_chain.invoke({"input": query, "chat_history": []})
+    return response, time.time() - start_time
+
 def run_evaluation():
     print("Initializing components for evaluation...")
     vsm = VectorStoreManager()
@@ -24,41 +34,43 @@ def run_evaluation():
     results = {}
 
     print("Starting evaluation...")
-    for chunk_strat in chunking_strategies:
-        for search_strat in search_strategies:
-            strategy_key = f"Chunk: {chunk_strat} | Search: {search_strat}"
-            print(f"\n--- Testing Strategy: {strategy_key} ---")
-            results[strategy_key] = []
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        for chunk_strat in chunking_strategies:
+            # Admin store for this chunking strategy, loaded from disk when up to date
+            admin_vs = vsm.load_or_build(chunk_strat)
+            for search_strat in search_strategies:
+                strategy_key = f"Chunk: {chunk_strat} | Search: {search_strat}"
+                print(f"\n--- Testing Strategy: {strategy_key} ---")
             
-            # Note: For a true evaluation, the vector store should be rebuilt
-            # with the specific chunking strategy. This script simplifies by
-            # using the default chunking for the pre-built admin store.
-            # A more advanced script would rebuild the store for each strategy.
-            retriever = vsm.get_retriever(user_vs=None, search_type=search_strat)
-            rag_chain = llm.get_rag_chain(retriever)
+                retriever = vsm.get_retriever(user_vs=None, search_type=search_strat, admin_vs=admin_vs)
+                rag_chain = llm.get_rag_chain(retriever)
 
-            for query in test_queries:
-                print(f"Querying: {query}")
-                start_time = time.time()
-                
-                response = rag_chain.invoke({"input": query, "chat_history": []})
-                
-                end_time = time.time()
-                latency = end_time - start_time
+                futures = {}
+                for query in test_queries:
+                    print(f"Querying: {query}")
+                    futures[executor.submit(timed_invoke, rag_chain, query)] = query
+
+                strategy_results = {}
+                for future in as_completed(futures):
+                    query = futures[future]
+                    response, latency = future.result()
                 
-                answer = response.get("answer", "No answer found.")
-                context_docs = response.get("context", [])
+                    answer = response.get("answer", "No answer found.")
+                    context_docs = response.get("context", [])
                 
-                # Basic evaluation metrics
-                eval_metrics = {
-                    "query": query,
-                    "answer": answer,
-                    "retrieved_docs": len(context_docs),
-                    "latency_seconds": round(latency, 2),
-                    # You could add more advanced metrics here (e.g., LLM-as-judge)
-                }
-                results[strategy_key].append(eval_metrics)
-                print(f"Latency: {latency:.2f}s, Retrieved docs: {len(context_docs)}")
+                    # Basic evaluation metrics
+                    eval_metrics = {
+                        "query": query,
+                        "answer": answer,
+                        "retrieved_docs": len(context_docs),
+                        "latency_seconds": round(latency, 2),
+                        # You could add more advanced metrics here (e.g., LLM-as-judge)
+                    }
+                    strategy_results[query] = eval_metrics
+                    print(f"Latency: {latency:.2f}s, Retrieved docs: {len(context_docs)}")
+
+                # Keep the report in the order of the evaluation set
+                results[strategy_key] = [strategy_results[query] for query in test_queries]
 
     # --- Print Results ---
     print("\n\n--- EVALUATION COMPLETE ---")
@@ -1,86 +1,283 @@
 import os
+import hashlib
+import pickle
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from typing import List, Union
+import faiss
+import torch
 from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter, CharacterTextSplitter
 from langchain_community.document_loaders import PyPDFLoader
 from langchain_community.retrievers import BM25Retriever  # <-- CORRECTED IMPORT
 from langchain.retrievers import EnsembleRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.retrievers import BaseRetriever
 from langchain.docstore.document import Document
+from langchain.storage import LocalFileStore
 import numpy as np
 from config import (
-    ADMIN_DOCS_PATH, VECTOR_STORE_PATH, EMBEDDING_MODEL_NAME, K_RETRIEVER,
+    ADMIN_DOCS_PATH, VECTOR_STORE_PATH, EMBEDDING_MODEL_NAME, EMBED_BATCH_SIZE, EMBEDDING_BACKEND,
+    EMBEDDING_FP16_ON_GPU, K_RETRIEVER,
     DEFAULT_CHUNKING_STRATEGY, DEFAULT_SEARCH_STRATEGY, RECURSIVE_CHUNK_SIZE,
-    RECURSIVE_CHUNK_OVERLAP, FIXED_CHUNK_SIZE, FIXED_CHUNK_OVERLAP, SEMANTIC_N_CLUSTERS
+    RECURSIVE_CHUNK_OVERLAP, FIXED_CHUNK_SIZE, FIXED_CHUNK_OVERLAP, SEMANTIC_N_CLUSTERS,
+    RETRIEVER_CACHE_ENTRIES, QUANTIZE_MIN_VECTORS, IVF_MIN_VECTORS, IVF_NLIST, IVF_NPROBE, PQ_M
 )
 
+# FAISS needs roughly this many training vectors per IVF list / PQ centroid
+MIN_TRAINING_POINTS_PER_CENTROID = 39
+
+# Splitters are stateless, so one instance of each is shared by all calls
+_RECURSIVE_SPLITTER = RecursiveCharacterTextSplitter(
+    chunk_size=RECURSIVE_CHUNK_SIZE,
+    chunk_overlap=RECURSIVE_CHUNK_OVERLAP,
+    is_separator_regex=False
+)
+_FIXED_SPLITTER = CharacterTextSplitter(
+    separator="\n",
+    chunk_size=FIXED_CHUNK_SIZE,
+    chunk_overlap=FIXED_CHUNK_OVERLAP,
+    is_separator_regex=False
+)
+
+
+def _load_pdf(path: str) -> List[Document]:
+    """Loads a single PDF; module-level so it can run in a worker process."""
+    try:
+        return PyPDFLoader(path).load()
+    except Exception as e:
+        print(f"Error loading {path}: {e}")
+        return []
+
+
+def _embedding_cache_key(text: str) -> str:
+    """Key of a text's entry in the embedding cache; newlines are normalized as before encoding."""
+    return hashlib.sha256(text.replace("\n", " ").encode()).hexdigest()
+
+
+def _min_max_normalize(scores: np.ndarray) -> np.ndarray:
+    """Scales scores to [0, 1]; all-equal scores map to 0."""
+    if scores.size == 0:
+        return scores
+    span = scores.max() - scores.min()
+    if span <= 0:
+        return np.zeros_like(scores)
+    return (scores - scores.min()) / span
+
+
+class FusedHybridRetriever(BaseRetriever):
+    """Hybrid retriever blending one FAISS search with one BM25 scoring pass.
+
+    Vector and keyword scores are min-max normalized and mixed by vector_weight,
+    replacing separate retriever calls merged by EnsembleRetriever. The BM25
+    retriever must index the store's documents in FAISS id order.
+    """
+
+    vectorstore: FAISS
+    bm25_retriever: BM25Retriever
+    k: int = K_RETRIEVER
+    # Number of FAISS candidates that receive a vector score
+    fetch_k: int = 4 * K_RETRIEVER
+    vector_weight: float = 0.5
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        docs = self.bm25_retriever.docs
+        if not docs:
+            return []
+
+        query_vector = np.asarray([self.vectorstore.embeddings.embed_query(query)], dtype=np.float32)
+        distances, ids = self.vectorstore.index.search(query_vector, min(self.fetch_k, len(docs)))
+        found = ids[0] >= 0
+        candidate_scores = distances[0][found]
+        if self.vectorstore.index.metric_type == faiss.METRIC_L2:
+            # Stores saved before inner-product indexes return distances, lower is better
+            candidate_scores = -candidate_scores
+        vector_scores = np.zeros(len(docs), dtype=np.float32)
+        vector_scores[ids[0][found]] = _min_max_normalize(candidate_scores)
+
+        keyword_scores = self.bm25_retriever.vectorizer.get_scores(self.bm25_retriever.preprocess_func(query))
+        scores = self.vector_weight * vector_scores + (1 - self.vector_weight) * _min_max_normalize(keyword_scores)
+
+        k = min(self.k, len(docs))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [docs[i] for i in top]
+
+
+def _is_pdf(path: str) -> bool:
+    """Checks a file exists and starts with the PDF magic bytes."""
+    try:
+        with open(path, "rb") as f:
+            return f.read(5) == b"%PDF-"
+    except OSError:
+        return False
+
+
+def _load_pdfs(paths: List[str]) -> List[Document]:
+    """Loads PDFs in parallel across processes, since pypdf parsing is CPU-bound."""
+    if len(paths) <= 1:
+        return [doc for path in paths for doc in _load_pdf(path)]
+    with ProcessPoolExecutor(max_workers=min(len(paths), os.cpu_count() or 1)) as executor:
+        return [doc for docs in executor.map(_load_pdf, paths) for doc in docs]
+
 class VectorStoreManager:
     """Manages vector store creation, loading, and retrieval."""
 
+    # Maps newlines to spaces in a single C-level pass over each page
+    _NEWLINES_TO_SPACES = str.maketrans("\n", " ")
+
     def __init__(self):
         os.makedirs(ADMIN_DOCS_PATH, exist_ok=True)
         os.makedirs(VECTOR_STORE_PATH, exist_ok=True)
-        self.embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL_NAME)
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        if device == "cpu":
+            torch.set_num_threads(os.cpu_count() or 1)
+        # Unit-normalized embeddings make inner product equal to cosine similarity
+        self.embeddings = HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL_NAME,
+            model_kwargs={"backend": EMBEDDING_BACKEND, "device": device},
+            encode_kwargs={"batch_size": EMBED_BATCH_SIZE, "normalize_embeddings": True}
+        )
+        use_fp16 = device == "cuda" and EMBEDDING_BACKEND == "torch" and EMBEDDING_FP16_ON_GPU
+        if use_fp16:
+            self.embeddings.client.half()
+        # Pay tokenizer/model first-call costs here rather than on the first user query
+        self.embeddings.embed_query("warmup")
+        self._embedding_dim = self.embeddings.client.get_sentence_embedding_dimension()
+        # On-disk embeddings keyed by text hash, namespaced by model, backend and precision,
+        # since each of those changes the vectors produced for the same text
+        precision = "fp16" if use_fp16 else "fp32"
+        self._embedding_cache = LocalFileStore(
+            os.path.join(VECTOR_STORE_PATH, "emb_cache", EMBEDDING_MODEL_NAME, f"{EMBEDDING_BACKEND}-{precision}")
+        )
+        # In-RAM copies of memory-mapped admin indexes, which faiss cannot clone for merging
+        self._unmapped_indexes = weakref.WeakKeyDictionary()
         self.admin_vectorstore_path = os.path.join(VECTOR_STORE_PATH, "admin_faiss_index")
         self.admin_vectorstore = self._load_or_create_admin_vectorstore()
+        # Per-chunking-strategy admin stores loaded by load_or_build
+        self._admin_vectorstores = {}
+        # Admin+user stores for hybrid search, dropped along with their user store
+        self._merged_vectorstores = weakref.WeakKeyDictionary()
+        # BM25 indexes keyed by the store whose documents they cover
+        self._bm25_retrievers = weakref.WeakKeyDictionary()
+        # LRU of built retrievers keyed by store ids; entries keep (admin_vs, user_vs, retriever)
+        # so a hit is only used when both stores are identical, since a freed store's id can be reused
+        self._retrievers = OrderedDict()
+        # The manager is shared across Streamlit session threads
+        self._retrievers_lock = threading.Lock()
 
     def _load_documents_from_path(self, path: str) -> List[Document]:
         """Loads PDF documents from a given directory path."""
-        documents = []
-        for filename in os.listdir(path):
-            if filename.endswith(".pdf"):
-                file_path = os.path.join(path, filename)
-                try:
-                    loader = PyPDFLoader(file_path)
-                    documents.extend(loader.load())
-                except Exception as e:
-                    print(f"Error loading {file_path}: {e}")
-        return documents
+        with os.scandir(path) as entries:
+            pdf_paths = [entry.path for entry in entries if entry.name.endswith(".pdf")]
+        return _load_pdfs(pdf_paths)
+
+    def _embed_texts(self, texts: List[str]) -> np.ndarray:
+        """Embeds texts into a float32 matrix of unit-normalized rows.
+
+        Embeddings are cached on disk as float16, keyed by the SHA-256 of the text,
+        so only texts not seen before reach the model. Misses go straight to the
+        underlying SentenceTransformer, which length-sorts its inputs into
+        padding-friendly batches and returns numpy without the per-vector list
+        conversion done by embed_documents.
+        """
+        if not texts:
+            return np.empty((0, self._embedding_dim), dtype=np.float32)
+        texts = [text.replace("\n", " ") for text in texts]
+        keys = [_embedding_cache_key(text) for text in texts]
+        text_by_key = dict(zip(keys, texts))
+        # Repeated texts (common sentences, boilerplate) are looked up and encoded once
+        cached = dict(zip(text_by_key, self._embedding_cache.mget(list(text_by_key))))
+
+        # Empty or truncated files (a crash or concurrent write mid-flush) are
+        # re-encoded and overwritten rather than trusted
+        blob_size = 2 * self._embedding_dim
+        missing = [key for key, value in cached.items() if value is None or len(value) != blob_size]
+        if missing:
+            # Embedding is compute-bound (transformer forward passes), so all misses go
+            # through a single encode call to amortize per-call dispatch and padding
+            # Grad mode is per-thread, so inference mode is entered here in the calling thread
+            with torch.inference_mode():
+                encoded = self.embeddings.client.encode(
+                    [text_by_key[key] for key in missing],
+                    batch_size=EMBED_BATCH_SIZE,
+                    normalize_embeddings=True,
+                    convert_to_numpy=True,
+                    show_progress_bar=False,
+                ).astype(np.float16)
+            new_entries = [(key, vector.tobytes()) for key, vector in zip(missing, encoded)]
+            self._embedding_cache.mset(new_entries)
+            cached.update(new_entries)
+
+        return np.vstack([np.frombuffer(cached[key], dtype=np.float16) for key in keys]).astype(np.float32)
+
+    def _cached_embeddings(self, texts: List[str]):
+        """Reads texts' embeddings from the cache only, never running the model.
+
+        Returns a float32 matrix, with zero rows for texts that are not cached,
+        and a boolean mask of the texts that were found.
+        """
+        vectors = np.zeros((len(texts), self._embedding_dim), dtype=np.float32)
+        found = np.zeros(len(texts), dtype=bool)
+        blob_size = 2 * self._embedding_dim
+        values = self._embedding_cache.mget([_embedding_cache_key(text) for text in texts])
+        for i, value in enumerate(values):
+            if value is not None and len(value) == blob_size:
+                vectors[i] = np.frombuffer(value, dtype=np.float16)
+                found[i] = True
+        return vectors, found
 
     def _semantic_chunking(self, documents: List[Document]) -> List[Document]:
         """Splits documents based on semantic clustering."""
         print("Performing semantic chunking...")
-        try:
-            from sklearn.cluster import KMeans
-        except ImportError:
-            print("Scikit-learn is not installed. Falling back to recursive chunking.")
-            return self._recursive_chunking(documents)
 
-        # Combine all documents into a single text block and then split into sentences
-        full_text = ". ".join([doc.page_content.replace("\n", " ") for doc in documents])
-        sentences = [s.strip() for s in full_text.split(". ") if s.strip()]
+        # Split each page into sentences directly rather than joining the whole corpus first
+        sentences = [
+            stripped
+            for doc in documents
+            for sentence in doc.page_content.translate(self._NEWLINES_TO_SPACES).split(". ")
+            if (stripped := sentence.strip())
+        ]
 
         if not sentences or len(sentences) < SEMANTIC_N_CLUSTERS:
             return self._recursive_chunking(documents)
 
-        sentence_embeddings = self.embeddings.embed_documents(sentences)
+        sentence_embeddings = self._embed_texts(sentences)
         
-        kmeans = KMeans(n_clusters=SEMANTIC_N_CLUSTERS, random_state=42, n_init='auto').fit(sentence_embeddings)
+        # FAISS k-means runs multithreaded on the float32 embeddings without copying
+        kmeans = faiss.Kmeans(sentence_embeddings.shape[1], SEMANTIC_N_CLUSTERS, niter=20, seed=42, verbose=False)
+        kmeans.train(sentence_embeddings)
+        _, labels = kmeans.index.search(sentence_embeddings, 1)
+        # The smallest integer type holding every cluster id; for 8/16-bit keys numpy's
+        # stable argsort is a linear-time radix sort, i.e. a counting-sort bucketing
+        labels = labels.ravel().astype(np.min_scalar_type(SEMANTIC_N_CLUSTERS - 1))
         
-        chunks = [[] for _ in range(SEMANTIC_N_CLUSTERS)]
-        for i, sentence in enumerate(sentences):
-            cluster_id = kmeans.labels_[i]
-            chunks[cluster_id].append(sentence)
+        # Group sentences by cluster with one stable sort instead of a Python loop
+        order = np.argsort(labels, kind="stable")
+        sorted_sentences = np.asarray(sentences, dtype=object)[order]
+        boundaries = np.cumsum(np.bincount(labels, minlength=SEMANTIC_N_CLUSTERS))[:-1]
+        chunks = np.split(sorted_sentences, boundaries)
         
-        final_chunks_text = [". ".join(chunk) for chunk in chunks if chunk]
+        final_chunks_text = [". ".join(chunk.tolist()) for chunk in chunks if chunk.size]
         return [Document(page_content=chunk) for chunk in final_chunks_text]
 
     def _recursive_chunking(self, documents: List[Document]) -> List[Document]:
         print("Performing recursive chunking...")
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=RECURSIVE_CHUNK_SIZE, 
-            chunk_overlap=RECURSIVE_CHUNK_OVERLAP
-        )
-        return text_splitter.split_documents(documents)
+        return _RECURSIVE_SPLITTER.split_documents(documents)
 
     def _fixed_size_chunking(self, documents: List[Document]) -> List[Document]:
         print("Performing fixed-size chunking...")
-        text_splitter = CharacterTextSplitter(
-            separator="\n", 
-            chunk_size=FIXED_CHUNK_SIZE, 
-            chunk_overlap=FIXED_CHUNK_OVERLAP
-        )
-        return text_splitter.split_documents(documents)
+        return _FIXED_SPLITTER.split_documents(documents)
 
     def get_chunks(self, documents: List[Document], strategy: str = DEFAULT_CHUNKING_STRATEGY) -> List[Document]:
         if strategy == "semantic":
@@ -90,78 +287,271 @@ class VectorStoreManager:
         else:
             return self._recursive_chunking(documents)
 
+    def _new_index(self, vectors: np.ndarray) -> faiss.Index:
+        """Returns an empty, trained inner-product index suited to the number of vectors.
+
+        Small stores keep float16 vectors, half the memory of float32 and needing no
+        training. Mid-sized stores keep int8 vectors via an 8-bit scalar quantizer,
+        a quarter of the memory. Large stores use IVF-PQ: each query scans
+        IVF_NPROBE of the IVF lists and every vector is compressed to PQ_M bytes.
+        """
+        num_vectors, dim = vectors.shape
+        if num_vectors >= IVF_MIN_VECTORS and dim % PQ_M == 0:
+            nlist = min(IVF_NLIST, num_vectors // MIN_TRAINING_POINTS_PER_CENTROID)
+            index = faiss.index_factory(dim, f"IVF{nlist},PQ{PQ_M}", faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            index.nprobe = IVF_NPROBE
+            # MMR search reconstructs vectors by id, which IVF indexes only support with a direct map
+            index.make_direct_map()
+            return index
+        if num_vectors >= QUANTIZE_MIN_VECTORS:
+            index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+            index.train(vectors)
+            return index
+        # Too few vectors to train the int8 value ranges reliably; float16 needs no training
+        return faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+
+    def _deduplicate(self, documents: List[Document]) -> List[Document]:
+        """Drops chunks whose text repeats an earlier one (headers, footers, boilerplate).
+
+        The first occurrence, and its metadata, is kept.
+        """
+        seen = set()
+        unique = []
+        for doc in documents:
+            digest = hashlib.blake2b(doc.page_content.encode(), digest_size=16).digest()
+            if digest not in seen:
+                seen.add(digest)
+                unique.append(doc)
+        return unique
+
+    def _create_faiss_store(self, documents: List[Document]) -> FAISS:
+        """Embeds documents into an inner-product FAISS store."""
+        documents = self._deduplicate(documents)
+        texts = [doc.page_content for doc in documents]
+        vectors = self._embed_texts(texts)
+        vectorstore = self._empty_faiss_store(self._new_index(vectors))
+        vectorstore.add_embeddings(zip(texts, vectors), metadatas=[doc.metadata for doc in documents])
+        return vectorstore
+
+    def _empty_faiss_store(self, index: faiss.Index = None) -> FAISS:
+        """Wraps an empty index (by default a fresh one) in a LangChain FAISS store."""
+        if index is None:
+            index = self._new_index(np.empty((0, self._embedding_dim), dtype=np.float32))
+        return FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore(),
+            index_to_docstore_id={},
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+        )
+
+    def _load_local(self, path: str) -> FAISS:
+        """Loads a FAISS store saved with save_local, memory-mapping IVF-PQ indexes.
+
+        Only the inverted lists of IVF-PQ stores are memory-mapped, so the kernel
+        pages them in on demand and processes share one copy. Scalar-quantized
+        stores and the docstore pickle are read fully into memory. The index is
+        read-only once loaded.
+        """
+        index_path = os.path.join(path, "index.faiss")
+        index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        if isinstance(index, faiss.IndexIVF):
+            index.nprobe = IVF_NPROBE
+            index.make_direct_map()
+        # Same trusted, locally written pickle FAISS.load_local would read
+        with open(os.path.join(path, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        vectorstore = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=docstore,
+            index_to_docstore_id=index_to_docstore_id,
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+        )
+        if isinstance(index, faiss.IndexIVF):
+            # Mapped inverted lists cannot be cloned; PQ codes are PQ_M bytes per vector,
+            # so an unmapped copy for _merge_vectorstores is small
+            self._unmapped_indexes[vectorstore] = faiss.read_index(index_path)
+        return vectorstore
+
+    def _merge_vectorstores(self, admin_vs: FAISS, user_vs: FAISS) -> FAISS:
+        """Combines the admin and a user store into one without re-embedding.
+
+        The admin index is cloned, keeping its trained quantizer, codebooks and
+        codes, and the user vectors are added to the clone, so nothing is
+        retrained. User vectors come from the float16 embedding cache; only
+        texts missing from it are read back from the user index. The result is
+        cached for as long as the user store is alive.
+        """
+        cached = self._merged_vectorstores.get(user_vs)
+        if cached is not None and cached[0] is admin_vs:
+            return cached[1]
+
+        user_ids = range(user_vs.index.ntotal)
+        texts = [user_vs.docstore.search(user_vs.index_to_docstore_id[i]).page_content for i in user_ids]
+        vectors, found = self._cached_embeddings(texts)
+        missing = np.flatnonzero(~found)
+        if missing.size:
+            vectors[missing] = user_vs.index.reconstruct_batch(missing)
+
+        index = faiss.clone_index(self._unmapped_indexes.get(admin_vs, admin_vs.index))
+        index.add(vectors)
+        if isinstance(index, faiss.IndexIVF):
+            # Cloning resets nprobe
+            index.nprobe = IVF_NPROBE
+            index.make_direct_map()
+        docstore_ids = [
+            store.index_to_docstore_id[i] for store in (admin_vs, user_vs) for i in range(store.index.ntotal)
+        ]
+        merged_vs = FAISS(
+            embedding_function=self.embeddings,
+            index=index,
+            docstore=InMemoryDocstore({**admin_vs.docstore._dict, **user_vs.docstore._dict}),
+            index_to_docstore_id=dict(enumerate(docstore_ids)),
+            distance_strategy=DistanceStrategy.MAX_INNER_PRODUCT,
+        )
+        self._merged_vectorstores[user_vs] = (admin_vs, merged_vs)
+        return merged_vs
+
     def _load_or_create_admin_vectorstore(self) -> FAISS:
         """Loads the admin vector store or creates it if it doesn't exist."""
         if os.path.exists(self.admin_vectorstore_path):
             print("Loading existing admin vector store...")
-            return FAISS.load_local(self.admin_vectorstore_path, self.embeddings, allow_dangerous_deserialization=True)
+            return self._load_local(self.admin_vectorstore_path)
         else:
             print("Creating new admin vector store...")
-            admin_docs = self._load_documents_from_path(ADMIN_DOCS_PATH)
-            if not admin_docs:
-                print("No admin documents found. Creating an empty vector store.")
-                # FAISS requires at least one document
-                return FAISS.from_texts(["This is a placeholder document for an empty admin store."], self.embeddings)
-            
-            chunks = self.get_chunks(admin_docs, strategy=DEFAULT_CHUNKING_STRATEGY)
-            vectorstore = FAISS.from_documents(documents=chunks, embedding=self.embeddings)
-            vectorstore.save_local(self.admin_vectorstore_path)
-            print("Admin vector store created and saved.")
-            return vectorstore
+            return self._build_admin_vectorstore(DEFAULT_CHUNKING_STRATEGY, self.admin_vectorstore_path)
+
+    def _build_admin_vectorstore(self, strategy: str, path: str) -> FAISS:
+        """Chunks and embeds the admin documents, saving the store to the given path."""
+        admin_docs = self._load_documents_from_path(ADMIN_DOCS_PATH)
+        if not admin_docs:
+            print("No admin documents found. Creating an empty vector store.")
+            return self._empty_faiss_store()
+        
+        chunks = self.get_chunks(admin_docs, strategy=strategy)
+        vectorstore = self._create_faiss_store(chunks)
+        vectorstore.save_local(path)
+        print("Admin vector store created and saved.")
+        return vectorstore
+
+    def _admin_docs_mtime(self) -> float:
+        """Returns the latest modification time of the admin docs folder and its PDFs."""
+        mtimes = [os.path.getmtime(ADMIN_DOCS_PATH)]
+        for filename in os.listdir(ADMIN_DOCS_PATH):
+            if filename.endswith(".pdf"):
+                mtimes.append(os.path.getmtime(os.path.join(ADMIN_DOCS_PATH, filename)))
+        return max(mtimes)
+
+    def load_or_build(self, strategy: str = DEFAULT_CHUNKING_STRATEGY) -> FAISS:
+        """Returns the admin vector store chunked with the given strategy.
+
+        Stores are persisted per strategy and only rebuilt when the admin docs
+        are newer than the saved index.
+        """
+        if strategy in self._admin_vectorstores:
+            return self._admin_vectorstores[strategy]
+        path = os.path.join(VECTOR_STORE_PATH, f"admin_faiss_index_{strategy}")
+        index_file = os.path.join(path, "index.faiss")
+        if os.path.exists(index_file) and os.path.getmtime(index_file) >= self._admin_docs_mtime():
+            print(f"Loading existing admin vector store ({strategy})...")
+            vectorstore = self._load_local(path)
+        else:
+            print(f"Creating new admin vector store ({strategy})...")
+            vectorstore = self._build_admin_vectorstore(strategy, path)
+        self._admin_vectorstores[strategy] = vectorstore
+        return vectorstore
 
     def create_user_vectorstore(self, file_paths: List[str], chunking_strategy: str) -> Union[FAISS, None]:
         """Creates an in-memory vector store for user-uploaded files."""
         if not file_paths:
             return None
         
-        documents = []
-        for path in file_paths:
-            if os.path.exists(path) and path.endswith(".pdf"):
-                try:
-                    loader = PyPDFLoader(path)
-                    documents.extend(loader.load())
-                except Exception as e:
-                    print(f"Error loading user file {path}: {e}")
+        # Header checks are I/O-bound, so they run on threads; mislabeled files never reach pypdf
+        with ThreadPoolExecutor() as executor:
+            pdf_paths = [path for path, is_pdf in zip(file_paths, executor.map(_is_pdf, file_paths)) if is_pdf]
+        documents = _load_pdfs(pdf_paths)
 
         if not documents:
             return None
 
         chunks = self.get_chunks(documents, strategy=chunking_strategy)
-        return FAISS.from_documents(documents=chunks, embedding=self.embeddings)
+        return self._create_faiss_store(chunks)
+
+    def _get_bm25_retriever(self, vectorstore: FAISS) -> BM25Retriever:
+        """Returns a BM25 retriever over a store's documents, tokenized once per store.
+
+        Documents are indexed in FAISS id order so BM25 positions match FAISS ids.
+        """
+        bm25_retriever = self._bm25_retrievers.get(vectorstore)
+        if bm25_retriever is None:
+            docs = [
+                vectorstore.docstore.search(vectorstore.index_to_docstore_id[i])
+                for i in range(len(vectorstore.index_to_docstore_id))
+            ]
+            bm25_retriever = BM25Retriever.from_documents(docs)
+            bm25_retriever.k = K_RETRIEVER
+            self._bm25_retrievers[vectorstore] = bm25_retriever
+        return bm25_retriever
+
+    def get_retriever(self, user_vs: FAISS = None, search_type: str = DEFAULT_SEARCH_STRATEGY,
+                      admin_vs: FAISS = None):
+        """Returns a retriever combining admin and optional user vector stores.
 
-    def get_retriever(self, user_vs: FAISS = None, search_type: str = DEFAULT_SEARCH_STRATEGY):
+        admin_vs overrides the default admin store, e.g. with one from load_or_build.
+        Retrievers are memoized per (admin store, user store, search type).
+        """
+        if admin_vs is None:
+            admin_vs = self.admin_vectorstore
+        key = (id(admin_vs), id(user_vs), search_type)
+        with self._retrievers_lock:
+            entry = self._retrievers.get(key)
+            if entry is not None and entry[0] is admin_vs and entry[1] is user_vs:
+                self._retrievers.move_to_end(key)
+                return entry[2]
+        # Built outside the lock so one slow build doesn't block other sessions
+        retriever = self._build_retriever(admin_vs, user_vs, search_type)
+        with self._retrievers_lock:
+            entry = self._retrievers.get(key)
+            if entry is not None and entry[0] is admin_vs and entry[1] is user_vs:
+                retriever = entry[2]
+            else:
+                self._retrievers[key] = (admin_vs, user_vs, retriever)
+            self._retrievers.move_to_end(key)
+            if len(self._retrievers) > RETRIEVER_CACHE_ENTRIES:
+                self._retrievers.popitem(last=False)
+        return retriever
+
+    def _build_retriever(self, admin_vs: FAISS, user_vs: Union[FAISS, None], search_type: str):
         """Creates a retriever combining admin and optional user vector stores."""
+        # An empty admin store has nothing to contribute; search the user store alone
+        if admin_vs.index.ntotal == 0 and user_vs:
+            admin_vs, user_vs = user_vs, None
         
         # Base retriever is always the admin store
-        admin_retriever = self.admin_vectorstore.as_retriever(search_kwargs={"k": K_RETRIEVER})
+        admin_retriever = admin_vs.as_retriever(search_kwargs={"k": K_RETRIEVER})
         
-        all_docs = list(self.admin_vectorstore.docstore._dict.values())
+        num_docs = len(admin_vs.docstore._dict)
         if user_vs and hasattr(user_vs.docstore, '_dict'):
-             all_docs.extend(list(user_vs.docstore._dict.values()))
+             num_docs += len(user_vs.docstore._dict)
         
         # If no user store is provided, behavior depends on search_type
         if not user_vs:
-            if search_type == "hybrid" and len(all_docs) > 1:
-                bm25_retriever = BM25Retriever.from_documents(all_docs)
-                bm25_retriever.k = K_RETRIEVER
-                return EnsembleRetriever(retrievers=[admin_retriever, bm25_retriever], weights=[0.5, 0.5])
+            if search_type == "hybrid" and num_docs > 1:
+                return FusedHybridRetriever(vectorstore=admin_vs, bm25_retriever=self._get_bm25_retriever(admin_vs))
             if search_type == "mmr":
-                return self.admin_vectorstore.as_retriever(search_type="mmr", search_kwargs={"k": K_RETRIEVER})
+                return admin_vs.as_retriever(search_type="mmr", search_kwargs={"k": K_RETRIEVER})
             return admin_retriever # Default to similarity
 
         # --- If a user store IS provided ---
         user_retriever = user_vs.as_retriever(search_kwargs={"k": K_RETRIEVER})
         
-        # For hybrid search, combine everything for BM25 and FAISS retrievers
-        if search_type == "hybrid" and len(all_docs) > 1:
-            # Recreate a combined FAISS store for a unified similarity search
-            combined_vs = FAISS.from_documents(all_docs, self.embeddings)
-            faiss_retriever = combined_vs.as_retriever(search_kwargs={"k": K_RETRIEVER})
-            
-            bm25_retriever = BM25Retriever.from_documents(all_docs)
-            bm25_retriever.k = K_RETRIEVER
-            
-            return EnsembleRetriever(retrievers=[faiss_retriever, bm25_retriever], weights=[0.5, 0.5])
+        # For hybrid search, score everything with one FAISS search and one BM25 pass
+        if search_type == "hybrid" and num_docs > 1:
+            # Combine the existing indexes for a unified similarity search
+            combined_vs = self._merge_vectorstores(admin_vs, user_vs)
+            return FusedHybridRetriever(vectorstore=combined_vs, bm25_retriever=self._get_bm25_retriever(combined_vs))
 
         # For non-hybrid search with user_vs, we can use EnsembleRetriever to query both
         # This is a simple way to combine results without rebuilding a new FAISS index